@@ -11,13 +11,26 @@ Leo ROI Zoom Tool - 科研图像局部放大图制作工具
 import tkinter as tk
 from tkinter import ttk, filedialog, colorchooser, messagebox
 from PIL import Image, ImageTk
+import importlib.util
 import os
 import json
-import tempfile
+import math
+import pickle
+import queue
 import re
+import time
 import platform
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from hashlib import blake2b
+from functools import lru_cache
 from pathlib import Path
-from copy import deepcopy
+
+# orjson 可选：解析/编码比标准库 json 快一个数量级，没有就退回 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # 导入核心功能
 from roi_zoom_tool import create_zoom_figure, draw_scale_bar, draw_annotation, draw_watermark
@@ -26,25 +39,123 @@ from roi_zoom_tool import create_zoom_figure, draw_scale_bar, draw_annotation, d
 CONFIG_FILE = Path(__file__).parent / '.roi_zoom_config.json'
 
 
+# 平台与滚轮修饰键在模块级算好，高频滚轮事件里不再反复判断
+_IS_MAC = platform.system() == 'Darwin'
+_CTRLCMD_MASK = 4 | 8 | 16  # Windows/Linux Control=4，macOS Command=8/16
+_SHIFT_MASK = 1
+
+
+# 水印位置的中英文映射是常量，提到模块级免得每次建面板重新分配
+_WATERMARK_POSITIONS = (
+    ('右下', 'bottom-right'),
+    ('左下', 'bottom-left'),
+    ('右上', 'top-right'),
+    ('左上', 'top-left'),
+    ('居中', 'center'),
+)
+_WATERMARK_POS_MAP = dict(_WATERMARK_POSITIONS)
+_WATERMARK_POS_MAP_REV = {v: k for k, v in _WATERMARK_POSITIONS}
+
+
+# 支持导入的图像扩展名
+_IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'})
+
+
+# 批量匹配用的正则在模块级预编译，免去每次调用的 re 缓存查找
+_MAG_SUFFIX_RE = re.compile(r'_?\d+x')
+_PANO_TOKEN_RE = re.compile(r'_?(pano|panorama|overview)')
+_ZOOM_TOKEN_RE = re.compile(r'_?(zoom|detail|magnif\w*)')
+
+
+@lru_cache(maxsize=256)
+def rgb_to_hex(rgb):
+    """RGB 元组转十六进制颜色串（带缓存，一次会话颜色种类有限）"""
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+
+def _int_label_updater(label):
+    """Scale 数值标签回调工厂
+
+    预绑定 configure 并记住上次文本，拖动时整数未变就不进 Tcl。
+    """
+    configure = label.configure
+    last = [None]
+
+    def _update(value):
+        text = str(int(float(value)))
+        if text != last[0]:
+            last[0] = text
+            configure(text=text)
+    return _update
+
+
+@lru_cache(maxsize=1)
+def _font_choices():
+    """字体下拉选项：常用字体在前，系统已装字体补在后面
+
+    枚举系统字体较慢，首次展开下拉时才调用（结果缓存）。
+    """
+    common = ['Arial', 'Helvetica', 'Times New Roman', 'Calibri', 'Georgia',
+              'Verdana', 'Courier New', 'SimHei', 'SimSun', 'Microsoft YaHei']
+    try:
+        import tkinter.font as tkfont
+        installed = sorted(f for f in tkfont.families() if not f.startswith('@'))
+    except tk.TclError:
+        installed = []
+    seen = set(common)
+    return common + [f for f in installed if f not in seen]
+
+
 # ============== 辅助类 ==============
 
 class PreviewDebouncer:
-    """防抖预览触发器"""
-    def __init__(self, root, callback, delay=500):
+    """防抖预览触发器（单定时器 + 截止时间模型）"""
+    __slots__ = ('root', 'callback', 'delay', '_job', '_deadline', '_suspended')
+
+    def __init__(self, root, callback, delay=200):
         self.root = root
         self.callback = callback
         self.delay = delay
         self._job = None
+        self._deadline = 0.0
+        self._suspended = False
 
     def trigger(self, *args):
-        """触发预览（带防抖）"""
+        """触发预览（带防抖）
+
+        只推进截止时间，不做 after_cancel/after 往返，
+        拖动滑块连续触发时每次调用都是 O(1)。
+        """
+        if self._suspended:
+            return
+        self._deadline = time.monotonic() + self.delay / 1000
+        if self._job is None:
+            self._job = self.root.after(self.delay, self._poll)
+
+    @contextmanager
+    def paused(self):
+        """暂停触发，批量改多个 Tk 变量时只在退出后排一次预览"""
+        self._suspended = True
+        try:
+            yield
+        finally:
+            self._suspended = False
+        self.trigger()
+
+    def _poll(self):
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            self._job = None
+            self.callback()
+        else:
+            self._job = self.root.after(max(1, int(remaining * 1000)), self._poll)
+
+    def flush(self):
+        """立即执行挂起的预览（滑块松开时调用，省掉尾部等待）"""
         if self._job:
             self.root.after_cancel(self._job)
-        self._job = self.root.after(self.delay, self._execute)
-
-    def _execute(self):
-        self._job = None
-        self.callback()
+            self._job = None
+            self.callback()
 
     def cancel(self):
         """取消待执行的预览"""
@@ -54,35 +165,71 @@ class PreviewDebouncer:
 
 
 class HistoryManager:
-    """历史记录管理器（撤销/重做）"""
+    """历史记录管理器（撤销/重做）
+
+    快照内容寻址存储：状态先 pickle 再按 blake2b 哈希去重，
+    栈里只保留 16 字节哈希。用户来回切换产生的相同状态共享
+    一份序列化数据，内存不随标注数量 x 历史深度膨胀。
+    """
+    __slots__ = ('max_history', 'undo_stack', 'redo_stack', '_blobs', '_refs')
+
     def __init__(self, max_history=20):
         self.max_history = max_history
-        self.undo_stack = []
+        self.undo_stack = []  # 快照哈希列表
         self.redo_stack = []
+        self._blobs = {}  # hash -> pickle 数据
+        self._refs = {}   # hash -> 栈内引用计数
+
+    def _store(self, state):
+        """序列化状态并存入去重仓库，返回哈希"""
+        blob = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        key = blake2b(blob, digest_size=16).digest()
+        if key not in self._blobs:
+            self._blobs[key] = blob
+        self._refs[key] = self._refs.get(key, 0) + 1
+        return key
+
+    def _release(self, key):
+        """减引用，无人引用时回收序列化数据"""
+        count = self._refs.get(key, 0) - 1
+        if count <= 0:
+            self._refs.pop(key, None)
+            self._blobs.pop(key, None)
+        else:
+            self._refs[key] = count
+
+    def _load(self, key):
+        return pickle.loads(self._blobs[key])
 
     def push(self, state):
         """保存状态"""
-        self.undo_stack.append(deepcopy(state))
+        self.undo_stack.append(self._store(state))
         if len(self.undo_stack) > self.max_history:
-            self.undo_stack.pop(0)
+            self._release(self.undo_stack.pop(0))
+        for key in self.redo_stack:
+            self._release(key)
         self.redo_stack.clear()
 
     def undo(self, current_state):
         """撤销"""
         if self.can_undo():
-            previous_state = self.undo_stack.pop()
-            self.redo_stack.append(deepcopy(current_state))
-            return deepcopy(previous_state)
+            key = self.undo_stack.pop()
+            self.redo_stack.append(self._store(current_state))
+            previous_state = self._load(key)
+            self._release(key)
+            return previous_state
         return None
 
     def redo(self, current_state):
         """重做"""
         if self.can_redo():
-            next_state = self.redo_stack.pop()
-            self.undo_stack.append(deepcopy(current_state))
+            key = self.redo_stack.pop()
+            self.undo_stack.append(self._store(current_state))
             if len(self.undo_stack) > self.max_history:
-                self.undo_stack.pop(0)
-            return deepcopy(next_state)
+                self._release(self.undo_stack.pop(0))
+            next_state = self._load(key)
+            self._release(key)
+            return next_state
         return None
 
     def can_undo(self):
@@ -97,11 +244,13 @@ class HistoryManager:
     def clear(self):
         self.undo_stack = []
         self.redo_stack = []
+        self._blobs = {}
+        self._refs = {}
 
 
 class CollapsiblePanel(ttk.Frame):
-    """可折叠面板"""
-    def __init__(self, parent, title, **kwargs):
+    """可折叠面板（内容延迟到首次展开时才构建）"""
+    def __init__(self, parent, title, builder=None, **kwargs):
         super().__init__(parent, **kwargs)
 
         self.is_expanded = tk.BooleanVar(value=False)
@@ -116,9 +265,12 @@ class CollapsiblePanel(ttk.Frame):
         )
         self.toggle_btn.pack(fill=tk.X, expand=True)
 
-        # 内容区域
+        # 内容区域：builder 在首次展开时填充，启动时不付
+        # 几十个 ttk 控件跨 Tcl 创建的成本
         self.content = ttk.Frame(self)
         self.title = title
+        self.builder = builder
+        self._built = builder is None
 
     def toggle(self):
         if self.is_expanded.get():
@@ -126,6 +278,10 @@ class CollapsiblePanel(ttk.Frame):
             self.toggle_btn.configure(text="▶ " + self.title)
             self.is_expanded.set(False)
         else:
+            if not self._built:
+                self.builder(self.content)
+                self._built = True
+                self.builder = None  # 构建完成后释放闭包引用
             self.content.pack(fill=tk.X, padx=5, pady=5)
             self.toggle_btn.configure(text="▼ " + self.title)
             self.is_expanded.set(True)
@@ -227,9 +383,63 @@ class ROIZoomGUI:
         self.watermark_color = (128, 128, 128)
 
         self.result_image = None  # 存储生成的结果图
-        self.temp_output_path = None  # 临时输出路径
         self.metadata = None  # 存储生成结果的元数据
 
+        # 缩略图缓存：按 (路径, mtime, 目标尺寸) 记忆解码结果，
+        # 避免参数变化时重复解码多 MB 的 TIFF/PNG
+        self._thumb_cache = {}
+        self._thumb_cache_size = 4
+
+        # 预览渲染比例：<1 表示当前预览是降采样渲染的，
+        # 导出时需要按全分辨率重新生成
+        self._preview_render_scale = 1.0
+
+        # 复用的预览 PhotoImage：尺寸不变时用 paste 原地写入，
+        # 避免每次刷新都在 Tk 里分配一份整图拷贝
+        self._preview_photo = None
+
+        # 渲染状态键与结果缓存：参数未变时跳过整次渲染，
+        # 撤销/重做回到近期状态时直接命中缓存
+        self._last_render_key = None
+        self._render_cache = {}
+        self._render_cache_size = 8
+
+        # 合成渲染放到单工作线程，主线程只做界面刷新；
+        # 在途时再触发只记一个待办标记
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._generating = False
+        self._regenerate_pending = False
+
+        # 延迟创建的控件引用预置为 None，
+        # 热路径上用 `is not None` 判断代替 hasattr
+        self.status_label = None
+        self.preview_canvas = None
+        self.annotation_listbox = None
+        self.zoom_scale_bar_position_widgets = []
+        self.preview_original_image = None
+        self._is_dragging = False
+        self.preview_scale = 1.0
+
+        # 结果图的 2 的幂降采样金字塔：缩小预览时从就近层级
+        # 做廉价 BILINEAR，免去每个滚轮刻度上整图 LANCZOS
+        self._preview_pyramid = None
+
+        # 滚轮缩放合并定时器与视口切片刷新定时器
+        self._zoom_job = None
+        self._tile_job = None
+
+        # 同一结果图按显示尺寸缓存重采样输出，来回切换缩放档位零成本
+        self._display_cache = {}
+
+        # 画布不可见（窗口最小化等）时挂起的待显示图
+        self._pending_preview = None
+
+        # 上一次送进 PhotoImage 的显示图标识，重复显示时跳过位图重传
+        self._last_displayed = None
+
+        # 导出对话框建一次反复复用（ttk 组件创建开销可观）
+        self._export_dialog = None
+
         # 历史记录管理器
         self.history = HistoryManager(max_history=20)
 
@@ -243,7 +453,15 @@ class ROIZoomGUI:
         self.create_widgets()
 
         # 设置防抖预览
-        self.debouncer = PreviewDebouncer(self.root, self.auto_preview, delay=500)
+        # 200ms 对交互来说足够平滑，渲染有缓存兜底，不必等满半秒
+        self.debouncer = PreviewDebouncer(self.root, self.auto_preview, delay=200)
+
+        # 所有影响渲染的变量统一经由一条 trace 进入防抖器，
+        # 避免每个控件各自持有一份触发逻辑
+        self._bind_preview_traces()
+
+        # 预绑定比例尺变量的 get 方法，配置装配时直接按表取值
+        self._init_scale_bar_getters()
 
         # 设置拖拽支持（如果 tkinterdnd2 可用）
         self.setup_drag_drop()
@@ -276,17 +494,14 @@ class ROIZoomGUI:
 
     def setup_drag_drop(self):
         """设置拖拽支持"""
-        try:
-            from tkinterdnd2 import DND_FILES, TkinterDnD
-            # 如果支持拖拽，添加拖拽功能
-            self.drag_drop_available = True
-        except ImportError:
-            self.drag_drop_available = False
+        # 只探测模块是否存在，不在启动时实际导入 tkinterdnd2
+        # （其编译的 TkDnD 绑定导入开销不小）；注册放置目标时再导入
+        self.drag_drop_available = importlib.util.find_spec('tkinterdnd2') is not None
 
     def setup_shortcuts(self):
         """设置快捷键"""
         # 检测操作系统
-        is_mac = platform.system() == 'Darwin'
+        is_mac = _IS_MAC
         modifier = 'Command' if is_mac else 'Control'
 
         # Ctrl/Cmd + G: 生成预览
@@ -317,7 +532,7 @@ class ROIZoomGUI:
         if state:
             self.restore_state(state)
             self.update_status()
-            self.auto_preview()
+            self.debouncer.trigger()
 
     def redo(self):
         """重做操作"""
@@ -325,14 +540,90 @@ class ROIZoomGUI:
         if state:
             self.restore_state(state)
             self.update_status()
-            self.auto_preview()
+            self.debouncer.trigger()
+
+    def _bind_preview_traces(self):
+        """为影响渲染的变量统一绑定防抖预览 trace"""
+        render_vars = [
+            self.position_var,
+            self.padding_var,
+            self.box_thickness_var,
+            self.line_thickness_var,
+            self.line_style_var,
+            self.dash_length_var,
+            self.gap_length_var,
+            self.show_pano_border,
+            self.show_roi_box,
+            self.show_zoom_border,
+            self.show_guide_lines,
+            self.show_scale_bar_text,
+            self.show_annotations,
+            self.roi_offset_x,
+            self.roi_offset_y,
+            self.pano_scale_bar_enabled,
+            self.pano_scale_bar_length_um,
+            self.pano_scale_bar_pixels_per_um,
+            self.pano_scale_bar_thickness,
+            self.pano_scale_bar_font_size,
+            self.pano_scale_bar_pos_x,
+            self.pano_scale_bar_offset_x,
+            self.pano_scale_bar_offset_y,
+            self.zoom_scale_bar_enabled,
+            self.zoom_scale_bar_length_um,
+            self.zoom_scale_bar_pixels_per_um,
+            self.zoom_scale_bar_thickness,
+            self.zoom_scale_bar_font_size,
+            self.zoom_scale_bar_pos_x,
+            self.zoom_scale_bar_offset_x,
+            self.zoom_scale_bar_offset_y,
+            self.scale_bar_sync_position,
+            self.scale_bar_style,
+            self.scale_bar_font_family,
+            self.scale_bar_text_gap,
+            self.watermark_enabled,
+            self.watermark_text,
+            self.watermark_position,
+            self.watermark_opacity,
+            self.watermark_font_size,
+        ]
+        self._render_var_by_name = {str(var): var for var in render_vars}
+        for var in render_vars:
+            var.trace_add('write', self._on_render_var_write)
+
+    @staticmethod
+    def _set_swatch_bg(swatch, hex_color):
+        """仅在颜色实际变化时更新色块背景，避免无谓的 Tcl 往返"""
+        if getattr(swatch, '_last_bg', None) != hex_color:
+            swatch.configure(bg=hex_color)
+            swatch._last_bg = hex_color
+
+    @staticmethod
+    def _make_swatch(parent, hex_color, width=20, height=15):
+        """创建颜色色块（普通 Frame 比 Canvas 轻量得多，无显示列表开销）"""
+        return tk.Frame(parent, width=width, height=height, bg=hex_color,
+                        highlightthickness=1, highlightbackground='gray')
+
+    def _on_render_var_write(self, name=None, *args):
+        """渲染参数变化 - 统一走防抖预览
+
+        数值输入框打字过程中会出现空串等非法中间态，
+        此时 get() 会失败，渲染注定报错，干脆不排预览。
+        """
+        var = self._render_var_by_name.get(name)
+        if var is not None:
+            try:
+                var.get()
+            except tk.TclError:
+                return
+        if self.debouncer:
+            self.debouncer.trigger()
 
     def _capture_state(self):
         """捕获当前可撤销状态"""
         return {
             'roi_offset_x': self.roi_offset_x.get(),
             'roi_offset_y': self.roi_offset_y.get(),
-            'annotations': deepcopy(self.annotations),
+            'annotations': list(self.annotations),
             'show_pano_border': self.show_pano_border.get(),
             'show_roi_box': self.show_roi_box.get(),
             'show_zoom_border': self.show_zoom_border.get(),
@@ -359,7 +650,7 @@ class ROIZoomGUI:
         """从历史恢复状态"""
         self.roi_offset_x.set(state.get('roi_offset_x', 0))
         self.roi_offset_y.set(state.get('roi_offset_y', 0))
-        self.annotations = deepcopy(state.get('annotations', []))
+        self.annotations = list(state.get('annotations', []))
         self.show_pano_border.set(state.get('show_pano_border', True))
         self.show_roi_box.set(state.get('show_roi_box', True))
         self.show_zoom_border.set(state.get('show_zoom_border', True))
@@ -374,11 +665,9 @@ class ROIZoomGUI:
         self.zoom_scale_bar_pixels_per_um.set(state.get('zoom_scale_bar_pixels_per_um', 1.0))
         self.watermark_enabled.set(state.get('watermark_enabled', False))
         self.watermark_text.set(state.get('watermark_text', ''))
-        if hasattr(self, '_update_scale_bar_position_widget_states'):
-            self._update_scale_bar_position_widget_states()
+        self._update_scale_bar_position_widget_states()
         # 更新标注列表显示
-        if hasattr(self, 'annotation_listbox'):
-            self.update_annotation_listbox()
+        self.update_annotation_listbox()
 
     def reset_roi_offset(self):
         """重置ROI偏移"""
@@ -393,20 +682,11 @@ class ROIZoomGUI:
         self.preview_canvas.configure(cursor='')
         self.update_status("操作已取消")
 
-    def _cleanup_temp_output(self):
-        """清理预览生成时的临时文件"""
-        if self.temp_output_path and os.path.exists(self.temp_output_path):
-            try:
-                os.remove(self.temp_output_path)
-            except OSError:
-                pass
-        self.temp_output_path = None
-
     def on_close(self):
         """应用关闭处理"""
         if self.debouncer:
             self.debouncer.cancel()
-        self._cleanup_temp_output()
+        self._pool.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
 
     def update_status(self, message=None):
@@ -418,30 +698,97 @@ class ROIZoomGUI:
             status_text = f"就绪 | 可撤销: {undo_count}步"
 
         # 添加快捷键提示
-        is_mac = platform.system() == 'Darwin'
+        is_mac = _IS_MAC
         mod = "Cmd" if is_mac else "Ctrl"
         status_text += f" | {mod}+G生成 {mod}+S保存 {mod}+Z撤销"
 
-        if hasattr(self, 'status_label'):
+        if self.status_label is not None:
             self.status_label.configure(text=status_text)
 
+    def _render_state_key(self):
+        """返回影响渲染结果的全部参数组成的键"""
+        def mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return None
+
+        pano = self.panorama_path.get()
+        zoom = self.zoom_path.get()
+
+        sb = self._build_scale_bar_configs()
+        if isinstance(sb, list):
+            sb_key = tuple(tuple(sorted(c.items())) for c in sb)
+        elif sb:
+            sb_key = (tuple(sorted(sb.items())),)
+        else:
+            sb_key = None
+
+        wm = self._build_watermark_config()
+        wm_key = tuple(sorted(wm.items())) if wm else None
+
+        if self.show_annotations.get() and self.annotations:
+            ann_key = tuple(tuple(sorted(a.items(), key=lambda kv: kv[0])) for a in self.annotations)
+        else:
+            ann_key = None
+
+        return (
+            pano, mtime(pano), zoom, mtime(zoom),
+            self.position_var.get(), self.padding_var.get(),
+            self.box_thickness_var.get(), self.line_thickness_var.get(),
+            self.color_var, self.line_style_var.get(),
+            self.dash_length_var.get(), self.gap_length_var.get(),
+            self.show_pano_border.get(), self.show_roi_box.get(),
+            self.show_zoom_border.get(), self.show_guide_lines.get(),
+            self.roi_offset_x.get(), self.roi_offset_y.get(),
+            sb_key, wm_key, ann_key,
+            self._preview_canvas_size(),
+        )
+
     def auto_preview(self):
         """自动预览（如果两个图像都已选择）"""
-        if self.panorama_path.get() and self.zoom_path.get():
-            if os.path.exists(self.panorama_path.get()) and os.path.exists(self.zoom_path.get()):
-                self.generate_preview()
+        if not (self.panorama_path.get() and self.zoom_path.get()):
+            return
+        if not (os.path.exists(self.panorama_path.get()) and os.path.exists(self.zoom_path.get())):
+            return
+
+        try:
+            key = self._render_state_key()
+        except tk.TclError:
+            # 某个数值输入框正处于半编辑状态，读不出合法值；
+            # 等输入完整后它自己的 trace 会再触发一次预览
+            return
+        if key == self._last_render_key and self.result_image is not None:
+            return  # 渲染参数没有实际变化
+
+        # 近期渲染过相同状态（典型场景：撤销/重做）时直接复用
+        cached = self._render_cache.pop(key, None)
+        if cached is not None:
+            self._render_cache[key] = cached  # 命中项移到末尾
+            self.result_image, self.metadata, self._preview_render_scale = cached
+            self._last_render_key = key
+            self.show_preview(self.result_image)
+            self.save_btn.configure(state=tk.NORMAL)
+            self.update_status("生成完成")
+            return
+
+        self.generate_preview()
 
     def _sync_zoom_scale_bar_position_from_pano(self):
-        """在位置联动模式下同步放大图比例尺位置参数"""
-        self.zoom_scale_bar_pos_x.set(self.pano_scale_bar_pos_x.get())
-        self.zoom_scale_bar_offset_x.set(self.pano_scale_bar_offset_x.get())
-        self.zoom_scale_bar_offset_y.set(self.pano_scale_bar_offset_y.get())
+        """在位置联动模式下同步放大图比例尺位置参数
+
+        三次 .set() 都会触发变量 trace，暂停防抖器让整批只排一次预览。
+        """
+        with self.debouncer.paused():
+            self.zoom_scale_bar_pos_x.set(self.pano_scale_bar_pos_x.get())
+            self.zoom_scale_bar_offset_x.set(self.pano_scale_bar_offset_x.get())
+            self.zoom_scale_bar_offset_y.set(self.pano_scale_bar_offset_y.get())
 
     def _update_scale_bar_position_widget_states(self):
         """根据是否独立设置更新放大图位置控件状态"""
         independent = self.scale_bar_sync_position.get()
         state = 'normal' if independent else 'disabled'
-        for widget in getattr(self, 'zoom_scale_bar_position_widgets', []):
+        for widget in self.zoom_scale_bar_position_widgets:
             widget.configure(state=state)
 
     def _get_scale_bar_position_settings(self, target):
@@ -461,47 +808,58 @@ class ROIZoomGUI:
             'offset_y': offset_y,
         }
 
+    def _init_scale_bar_getters(self):
+        """预绑定比例尺 Tk 变量的 get 方法
+
+        装配配置的热路径只需遍历一张表，不再做十几次属性查找。
+        """
+        shared = {
+            'show_text': self.show_scale_bar_text.get,
+            'style': self.scale_bar_style.get,
+            'font_family': self.scale_bar_font_family.get,
+            'text_gap': self.scale_bar_text_gap.get,
+        }
+        self._scale_bar_getters = {
+            'panorama': {
+                'length_um': self.pano_scale_bar_length_um.get,
+                'pixels_per_um': self.pano_scale_bar_pixels_per_um.get,
+                'thickness': self.pano_scale_bar_thickness.get,
+                'font_size': self.pano_scale_bar_font_size.get,
+                **shared,
+            },
+            'zoom': {
+                'length_um': self.zoom_scale_bar_length_um.get,
+                'pixels_per_um': self.zoom_scale_bar_pixels_per_um.get,
+                'thickness': self.zoom_scale_bar_thickness.get,
+                'font_size': self.zoom_scale_bar_font_size.get,
+                **shared,
+            },
+        }
+
+    def _scale_bar_config(self, target):
+        """按预绑定表装配单个比例尺配置"""
+        position = self._get_scale_bar_position_settings(target)
+        cfg = {
+            'enabled': True,
+            'position': target,
+            'corner': position['corner'],
+            'offset_x': position['offset_x'],
+            'offset_y': position['offset_y'],
+            'color': (self.pano_scale_bar_color if target == 'panorama'
+                      else self.zoom_scale_bar_color),
+        }
+        cfg.update((k, g()) for k, g in self._scale_bar_getters[target].items())
+        return cfg
+
     def _build_scale_bar_configs(self):
         """构建比例尺配置"""
         scale_bars = []
 
         if self.pano_scale_bar_enabled.get():
-            position = self._get_scale_bar_position_settings('panorama')
-            scale_bars.append({
-                'enabled': True,
-                'position': 'panorama',
-                'corner': position['corner'],
-                'offset_x': position['offset_x'],
-                'offset_y': position['offset_y'],
-                'length_um': self.pano_scale_bar_length_um.get(),
-                'pixels_per_um': self.pano_scale_bar_pixels_per_um.get(),
-                'color': self.pano_scale_bar_color,
-                'thickness': self.pano_scale_bar_thickness.get(),
-                'font_size': self.pano_scale_bar_font_size.get(),
-                'show_text': self.show_scale_bar_text.get(),
-                'style': self.scale_bar_style.get(),
-                'font_family': self.scale_bar_font_family.get(),
-                'text_gap': self.scale_bar_text_gap.get(),
-            })
+            scale_bars.append(self._scale_bar_config('panorama'))
 
         if self.zoom_scale_bar_enabled.get():
-            position = self._get_scale_bar_position_settings('zoom')
-            scale_bars.append({
-                'enabled': True,
-                'position': 'zoom',
-                'corner': position['corner'],
-                'offset_x': position['offset_x'],
-                'offset_y': position['offset_y'],
-                'length_um': self.zoom_scale_bar_length_um.get(),
-                'pixels_per_um': self.zoom_scale_bar_pixels_per_um.get(),
-                'color': self.zoom_scale_bar_color,
-                'thickness': self.zoom_scale_bar_thickness.get(),
-                'font_size': self.zoom_scale_bar_font_size.get(),
-                'show_text': self.show_scale_bar_text.get(),
-                'style': self.scale_bar_style.get(),
-                'font_family': self.scale_bar_font_family.get(),
-                'text_gap': self.scale_bar_text_gap.get(),
-            })
+            scale_bars.append(self._scale_bar_config('zoom'))
 
         if not scale_bars:
             return None
@@ -515,8 +873,7 @@ class ROIZoomGUI:
             return None
 
         position = self.watermark_position.get()
-        if hasattr(self, 'watermark_position_map') and position in self.watermark_position_map:
-            position = self.watermark_position_map[position]
+        position = _WATERMARK_POS_MAP.get(position, position)
 
         return {
             'enabled': True,
@@ -550,16 +907,103 @@ class ROIZoomGUI:
             'gap_length': self.gap_length_var.get(),
             'roi_offset': (self.roi_offset_x.get(), self.roi_offset_y.get()),
             'scale_bar': self._build_scale_bar_configs(),
-            'annotations': deepcopy(self.annotations) if self.show_annotations.get() and self.annotations else None,
+            'annotations': tuple(self.annotations) if self.show_annotations.get() and self.annotations else None,
             'watermark': self._build_watermark_config(),
         }
 
+    def _preview_canvas_size(self):
+        """预览画布尺寸（窗口尚未布局时使用回退值）"""
+        canvas_w = self.preview_canvas.winfo_width() if self.preview_canvas is not None else 0
+        canvas_h = self.preview_canvas.winfo_height() if self.preview_canvas is not None else 0
+        if canvas_w <= 1 or canvas_h <= 1:
+            canvas_w, canvas_h = 800, 600
+        return canvas_w, canvas_h
+
+    def _compute_preview_render_scale(self, pano_size):
+        """计算预览渲染比例
+
+        预览画布只有几百像素宽，按全分辨率渲染后再缩小纯属浪费；
+        这里根据画布尺寸决定降采样比例，导出时仍走全分辨率。
+
+        比例向下取整到 5% 档位：窗口拖个一两像素不再产生新的
+        渲染比例，渲染缓存键与缩放后的几何参数保持稳定。
+        """
+        canvas_w, canvas_h = self._preview_canvas_size()
+        scale = min(canvas_w / pano_size[0], canvas_h / pano_size[1], 1.0)
+        return max(0.05, math.floor(scale * 20) / 20)
+
+    @staticmethod
+    def _open_preview_source(path, target_long_edge):
+        """打开预览用源图
+
+        JPEG 通过 draft() 让 libjpeg 以 1/2、1/4、1/8 原生尺寸解码，
+        几十 MP 的全景图解码开销可以降一个数量级；
+        其他格式 draft() 是空操作，行为不变。
+        """
+        img = Image.open(path)
+        img.draft('RGB', (target_long_edge, target_long_edge))
+        img.load()
+        return img
+
+    def _scale_render_kwargs(self, kwargs, scale):
+        """按预览渲染比例缩放几何参数，使降采样预览构图与全分辨率一致"""
+        def scale_len(value, minimum=1):
+            return max(minimum, int(round(value * scale)))
+
+        scaled = dict(kwargs)
+        scaled['padding'] = int(round(kwargs['padding'] * scale))
+        scaled['box_thickness'] = scale_len(kwargs['box_thickness'])
+        scaled['line_thickness'] = scale_len(kwargs['line_thickness'])
+        scaled['zoom_box_thickness'] = scale_len(kwargs['zoom_box_thickness'])
+        scaled['dash_length'] = scale_len(kwargs['dash_length'])
+        scaled['gap_length'] = scale_len(kwargs['gap_length'], minimum=0)
+        scaled['roi_offset'] = (
+            int(round(kwargs['roi_offset'][0] * scale)),
+            int(round(kwargs['roi_offset'][1] * scale)),
+        )
+
+        def scale_sb(cfg):
+            cfg = dict(cfg)
+            cfg['pixels_per_um'] = cfg.get('pixels_per_um', 1.0) * scale
+            cfg['offset_x'] = int(round(cfg.get('offset_x', 30) * scale))
+            cfg['offset_y'] = int(round(cfg.get('offset_y', 30) * scale))
+            cfg['thickness'] = scale_len(cfg.get('thickness', 5))
+            cfg['font_size'] = scale_len(cfg.get('font_size', 24), minimum=8)
+            cfg['text_gap'] = int(round(cfg.get('text_gap', 5) * scale))
+            return cfg
+
+        sb = kwargs.get('scale_bar')
+        if sb:
+            scaled['scale_bar'] = [scale_sb(c) for c in sb] if isinstance(sb, list) else scale_sb(sb)
+
+        anns = kwargs.get('annotations')
+        if anns:
+            scaled_anns = []
+            for ann in anns:
+                ann = dict(ann)
+                pos = ann.get('position', (0, 0))
+                ann['position'] = (int(round(pos[0] * scale)), int(round(pos[1] * scale)))
+                ann['size'] = scale_len(ann.get('size', 20), minimum=2)
+                ann['thickness'] = scale_len(ann.get('thickness', 3))
+                ann['font_size'] = scale_len(ann.get('font_size', 16), minimum=6)
+                scaled_anns.append(ann)
+            scaled['annotations'] = scaled_anns
+
+        wm = kwargs.get('watermark')
+        if wm:
+            scaled['watermark'] = {**wm, 'font_size': scale_len(wm.get('font_size', 24), minimum=8)}
+
+        return scaled
+
     def load_config(self):
         """加载默认配置"""
         if CONFIG_FILE.exists():
             try:
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                if orjson is not None:
+                    config = orjson.loads(CONFIG_FILE.read_bytes())
+                else:
+                    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                        config = json.load(f)
                 self.position_var.set(config.get('position', 'right'))
                 self.padding_var.set(config.get('padding', 50))
                 self.box_thickness_var.set(config.get('box_thickness', 3))
@@ -612,11 +1056,7 @@ class ROIZoomGUI:
                 self.watermark_text.set(watermark_config.get('text', ''))
                 # 将英文位置值转换为中文显示值
                 pos_en = watermark_config.get('position', 'bottom-right')
-                pos_map_reverse = {
-                    'bottom-right': '右下', 'bottom-left': '左下',
-                    'top-right': '右上', 'top-left': '左上', 'center': '居中'
-                }
-                self.watermark_position.set(pos_map_reverse.get(pos_en, '右下'))
+                self.watermark_position.set(_WATERMARK_POS_MAP_REV.get(pos_en, '右下'))
                 self.watermark_opacity.set(watermark_config.get('opacity', 128))
                 self.watermark_font_size.set(watermark_config.get('font_size', 24))
                 self.watermark_color = tuple(watermark_config.get('color', [128, 128, 128]))
@@ -675,15 +1115,18 @@ class ROIZoomGUI:
             'watermark': {
                 'enabled': self.watermark_enabled.get(),
                 'text': self.watermark_text.get(),
-                'position': self.watermark_position_map.get(self.watermark_position.get(), 'bottom-right') if hasattr(self, 'watermark_position_map') else self.watermark_position.get(),
+                'position': _WATERMARK_POS_MAP.get(self.watermark_position.get(), 'bottom-right'),
                 'opacity': self.watermark_opacity.get(),
                 'font_size': self.watermark_font_size.get(),
                 'color': list(self.watermark_color),
             }
         }
         try:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                CONFIG_FILE.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+            else:
+                with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(config, f, indent=2, ensure_ascii=False)
             messagebox.showinfo("保存成功", "当前设置已保存为默认设置")
         except Exception as e:
             messagebox.showerror("保存失败", f"保存配置时出错:\n{str(e)}")
@@ -729,10 +1172,6 @@ class ROIZoomGUI:
         self.left_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         left_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # 绑定鼠标滚轮区域
-        # 左侧设置面板滚动绑定
-        self.left_canvas.bind('<Enter>', self._bind_left_scroll)
-        self.left_canvas.bind('<Leave>', self._unbind_left_scroll)
 
         # 右侧：预览
         right_frame = ttk.Frame(content_frame)
@@ -752,30 +1191,47 @@ class ROIZoomGUI:
         # === 底部状态栏 ===
         self.create_status_bar(main_frame)
 
-    def _bind_left_scroll(self, event):
-        """绑定左侧面板滚动"""
-        if platform.system() == 'Darwin':
-            self.left_canvas.bind_all("<MouseWheel>", self._on_left_mousewheel)
-        else:
-            self.left_canvas.bind_all("<MouseWheel>", self._on_left_mousewheel)
-            self.left_canvas.bind_all("<Button-4>", lambda e: self.left_canvas.yview_scroll(-1, "units"))
-            self.left_canvas.bind_all("<Button-5>", lambda e: self.left_canvas.yview_scroll(1, "units"))
-
-    def _unbind_left_scroll(self, event):
-        """解绑左侧面板滚动"""
-        if platform.system() == 'Darwin':
-            self.left_canvas.unbind_all("<MouseWheel>")
-        else:
-            self.left_canvas.unbind_all("<MouseWheel>")
-            self.left_canvas.unbind_all("<Button-4>")
-            self.left_canvas.unbind_all("<Button-5>")
-
-    def _on_left_mousewheel(self, event):
-        """处理左侧面板滚动"""
-        if platform.system() == 'Darwin':
-            self.left_canvas.yview_scroll(int(-1 * event.delta), "units")
-        else:
-            self.left_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        # 滚轮只在构建时全局绑定一次，由分发器按光标位置路由，
+        # 避免 Enter/Leave 时反复 bind_all/unbind_all
+        self.root.bind_all("<MouseWheel>", self._on_global_wheel)
+        self.root.bind_all("<Button-4>", self._on_global_wheel)
+        self.root.bind_all("<Button-5>", self._on_global_wheel)
+
+        # 滑块拖动期间 command= 只更新数字标签；松开时立即冲刷
+        # 挂起的预览，省掉防抖尾部等待（按类绑定覆盖所有 ttk.Scale）
+        self.root.bind_class(
+            'TScale', '<ButtonRelease-1>',
+            lambda e: self.debouncer.flush() if self.debouncer else None,
+            add='+'
+        )
+
+    @staticmethod
+    def _wheel_delta(event):
+        """统一各平台的滚轮增量"""
+        num = getattr(event, 'num', None)
+        if num == 4:  # Linux 上滚
+            return -1
+        if num == 5:  # Linux 下滚
+            return 1
+        if _IS_MAC:
+            return int(-1 * event.delta)
+        return int(-1 * (event.delta / 120))
+
+    @staticmethod
+    def _is_under(widget, ancestor):
+        """判断 widget 是否为 ancestor 本身或其后代（按 Tk 路径名前缀）"""
+        if widget is None or ancestor is None:
+            return False
+        w, a = str(widget), str(ancestor)
+        return w == a or w.startswith(a + '.')
+
+    def _on_global_wheel(self, event):
+        """全局滚轮分发：滚动光标所在的画布"""
+        widget = self.root.winfo_containing(event.x_root, event.y_root)
+        if self._is_under(widget, self.preview_canvas):
+            self._on_preview_mousewheel(event)
+        elif self._is_under(widget, self.left_canvas):
+            self.left_canvas.yview_scroll(self._wheel_delta(event), "units")
 
     def create_input_section(self, parent):
         """创建输入文件选择区域"""
@@ -837,7 +1293,7 @@ class ROIZoomGUI:
         padding_scale = ttk.Scale(
             padding_frame, from_=0, to=500,
             variable=self.padding_var, orient=tk.HORIZONTAL,
-            command=lambda v: self.padding_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.padding_label)
         )
         padding_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
 
@@ -851,7 +1307,7 @@ class ROIZoomGUI:
         box_scale = ttk.Scale(
             box_frame, from_=1, to=20,
             variable=self.box_thickness_var, orient=tk.HORIZONTAL,
-            command=lambda v: self.box_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.box_label)
         )
         box_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
 
@@ -865,7 +1321,7 @@ class ROIZoomGUI:
         line_scale = ttk.Scale(
             line_frame, from_=1, to=20,
             variable=self.line_thickness_var, orient=tk.HORIZONTAL,
-            command=lambda v: self.line_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.line_label)
         )
         line_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
 
@@ -874,16 +1330,15 @@ class ROIZoomGUI:
         color_frame.pack(fill=tk.X, pady=5)
 
         ttk.Label(color_frame, text="颜色:").pack(side=tk.LEFT)
-        self.color_preview = tk.Canvas(color_frame, width=30, height=20, bg='#ff0000',
-                                        highlightthickness=1, highlightbackground='gray')
+        self.color_preview = self._make_swatch(color_frame, '#ff0000', width=30, height=20)
         self.color_preview.pack(side=tk.LEFT, padx=10)
         ttk.Button(color_frame, text="选择颜色...", command=self.select_color).pack(side=tk.LEFT)
         self.color_hex_label = ttk.Label(color_frame, text="#FF0000")
         self.color_hex_label.pack(side=tk.LEFT, padx=10)
 
         # 更新颜色预览（根据加载的配置）
-        color_hex = '#{:02x}{:02x}{:02x}'.format(*self.color_var)
-        self.color_preview.configure(bg=color_hex)
+        color_hex = rgb_to_hex(self.color_var)
+        self._set_swatch_bg(self.color_preview, color_hex)
         self.color_hex_label.configure(text=color_hex.upper())
 
         # 元素显示控制
@@ -902,8 +1357,7 @@ class ROIZoomGUI:
             ttk.Checkbutton(
                 visibility_frame,
                 text=label,
-                variable=variable,
-                command=lambda: self.debouncer.trigger() if self.debouncer else None
+                variable=variable
             ).grid(row=index // 2, column=index % 2, sticky=tk.W, padx=5, pady=2)
 
         ttk.Label(
@@ -934,7 +1388,7 @@ class ROIZoomGUI:
         dash_scale = ttk.Scale(
             self.dash_frame, from_=5, to=50,
             variable=self.dash_length_var, orient=tk.HORIZONTAL,
-            command=lambda v: self.dash_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.dash_label)
         )
         dash_scale.pack(side=tk.LEFT, padx=5)
 
@@ -944,7 +1398,7 @@ class ROIZoomGUI:
         gap_scale = ttk.Scale(
             self.dash_frame, from_=3, to=30,
             variable=self.gap_length_var, orient=tk.HORIZONTAL,
-            command=lambda v: self.gap_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.gap_label)
         )
         gap_scale.pack(side=tk.LEFT, padx=5)
 
@@ -960,11 +1414,11 @@ class ROIZoomGUI:
 
     def create_scale_bar_panel(self, parent):
         """创建比例尺面板"""
-        panel = CollapsiblePanel(parent, "比例尺")
+        panel = CollapsiblePanel(parent, "比例尺", builder=self._build_scale_bar_panel_content)
         panel.pack(fill=tk.X, pady=(0, 5))
 
-        content = panel.content
-
+    def _build_scale_bar_panel_content(self, content):
+        """填充比例尺面板内容（首次展开时调用）"""
         # ===== 全景图比例尺 =====
         pano_frame = ttk.LabelFrame(content, text="全景图比例尺", padding="5")
         pano_frame.pack(fill=tk.X, pady=5)
@@ -972,8 +1426,7 @@ class ROIZoomGUI:
         # 启用
         ttk.Checkbutton(
             pano_frame, text="启用",
-            variable=self.pano_scale_bar_enabled,
-            command=lambda: self.debouncer.trigger()
+            variable=self.pano_scale_bar_enabled
         ).pack(anchor=tk.W)
 
         # 全景图 - 实际长度
@@ -997,10 +1450,7 @@ class ROIZoomGUI:
         pano_color_frame = ttk.Frame(pano_frame)
         pano_color_frame.pack(fill=tk.X, pady=2)
         ttk.Label(pano_color_frame, text="颜色:").pack(side=tk.LEFT)
-        self.pano_scale_bar_color_preview = tk.Canvas(
-            pano_color_frame, width=20, height=15, bg='#000000',
-            highlightthickness=1, highlightbackground='gray'
-        )
+        self.pano_scale_bar_color_preview = self._make_swatch(pano_color_frame, '#000000')
         self.pano_scale_bar_color_preview.pack(side=tk.LEFT, padx=5)
         ttk.Button(pano_color_frame, text="选择", command=self.select_pano_scale_bar_color).pack(side=tk.LEFT)
 
@@ -1011,8 +1461,7 @@ class ROIZoomGUI:
         # 启用
         ttk.Checkbutton(
             zoom_frame, text="启用",
-            variable=self.zoom_scale_bar_enabled,
-            command=lambda: self.debouncer.trigger()
+            variable=self.zoom_scale_bar_enabled
         ).pack(anchor=tk.W)
 
         # 放大图 - 实际长度
@@ -1036,10 +1485,7 @@ class ROIZoomGUI:
         zoom_color_frame = ttk.Frame(zoom_frame)
         zoom_color_frame.pack(fill=tk.X, pady=2)
         ttk.Label(zoom_color_frame, text="颜色:").pack(side=tk.LEFT)
-        self.zoom_scale_bar_color_preview = tk.Canvas(
-            zoom_color_frame, width=20, height=15, bg='#000000',
-            highlightthickness=1, highlightbackground='gray'
-        )
+        self.zoom_scale_bar_color_preview = self._make_swatch(zoom_color_frame, '#000000')
         self.zoom_scale_bar_color_preview.pack(side=tk.LEFT, padx=5)
         ttk.Button(zoom_color_frame, text="选择", command=self.select_zoom_scale_bar_color).pack(side=tk.LEFT)
 
@@ -1092,14 +1538,12 @@ class ROIZoomGUI:
         ttk.Label(zoom_pos_x_frame, text="水平:").pack(side=tk.LEFT)
         self.zoom_pos_left_rb = ttk.Radiobutton(
             zoom_pos_x_frame, text="左", value='左',
-            variable=self.zoom_scale_bar_pos_x,
-            command=self.on_zoom_scale_bar_pos_change
+            variable=self.zoom_scale_bar_pos_x
         )
         self.zoom_pos_left_rb.pack(side=tk.LEFT, padx=5)
         self.zoom_pos_right_rb = ttk.Radiobutton(
             zoom_pos_x_frame, text="右", value='右',
-            variable=self.zoom_scale_bar_pos_x,
-            command=self.on_zoom_scale_bar_pos_change
+            variable=self.zoom_scale_bar_pos_x
         )
         self.zoom_pos_right_rb.pack(side=tk.LEFT, padx=5)
 
@@ -1108,8 +1552,7 @@ class ROIZoomGUI:
         ttk.Label(zoom_offset_x_frame, text="X偏移:").pack(side=tk.LEFT)
         self.zoom_offset_x_spinbox = ttk.Spinbox(
             zoom_offset_x_frame, from_=0, to=500, width=6,
-            textvariable=self.zoom_scale_bar_offset_x,
-            command=self.on_zoom_scale_bar_pos_change
+            textvariable=self.zoom_scale_bar_offset_x
         )
         self.zoom_offset_x_spinbox.pack(side=tk.LEFT, padx=5)
 
@@ -1118,8 +1561,7 @@ class ROIZoomGUI:
         ttk.Label(zoom_offset_y_frame, text="Y偏移(距底):").pack(side=tk.LEFT)
         self.zoom_offset_y_spinbox = ttk.Spinbox(
             zoom_offset_y_frame, from_=0, to=500, width=6,
-            textvariable=self.zoom_scale_bar_offset_y,
-            command=self.on_zoom_scale_bar_pos_change
+            textvariable=self.zoom_scale_bar_offset_y
         )
         self.zoom_offset_y_spinbox.pack(side=tk.LEFT, padx=5)
 
@@ -1146,8 +1588,7 @@ class ROIZoomGUI:
         ]
         for text, value in styles:
             ttk.Radiobutton(style_frame, text=text, value=value,
-                            variable=self.scale_bar_style,
-                            command=lambda: self.debouncer.trigger()).pack(side=tk.LEFT, padx=3)
+                            variable=self.scale_bar_style).pack(side=tk.LEFT, padx=3)
 
         # 线宽
         thickness_frame = ttk.Frame(common_frame)
@@ -1158,18 +1599,17 @@ class ROIZoomGUI:
         ttk.Scale(
             thickness_frame, from_=1, to=50,
             variable=self.pano_scale_bar_thickness, orient=tk.HORIZONTAL,
-            command=lambda v: self.thickness_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.thickness_label)
         ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
         # 字体选择
         font_family_frame = ttk.Frame(common_frame)
         font_family_frame.pack(fill=tk.X, pady=2)
         ttk.Label(font_family_frame, text="字体:").pack(side=tk.LEFT)
-        # 常用字体列表
-        fonts = ['Arial', 'Helvetica', 'Times New Roman', 'Calibri', 'Georgia',
-                 'Verdana', 'Courier New', 'SimHei', 'SimSun', 'Microsoft YaHei']
+        # 字体列表延迟到首次展开下拉时才枚举
         font_combo = ttk.Combobox(font_family_frame, textvariable=self.scale_bar_font_family,
-                                   values=fonts, width=15, state='readonly')
+                                   width=15, state='readonly')
+        font_combo.configure(postcommand=lambda: font_combo.configure(values=_font_choices()))
         font_combo.pack(side=tk.LEFT, padx=5)
 
         # 字体大小
@@ -1181,7 +1621,7 @@ class ROIZoomGUI:
         ttk.Scale(
             font_size_frame, from_=8, to=120,
             variable=self.pano_scale_bar_font_size, orient=tk.HORIZONTAL,
-            command=lambda v: self.font_size_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.font_size_label)
         ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
         # 文字间距
@@ -1193,7 +1633,7 @@ class ROIZoomGUI:
         ttk.Scale(
             text_gap_frame, from_=0, to=50,
             variable=self.scale_bar_text_gap, orient=tk.HORIZONTAL,
-            command=lambda v: self.text_gap_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.text_gap_label)
         ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
     def on_scale_bar_sync_change(self):
@@ -1201,38 +1641,31 @@ class ROIZoomGUI:
         if not self.scale_bar_sync_position.get():
             self._sync_zoom_scale_bar_position_from_pano()
         self._update_scale_bar_position_widget_states()
-        self.debouncer.trigger()
 
     def on_scale_bar_pos_change(self):
         """比例尺位置变化 - 默认同时调整两个"""
         if not self.scale_bar_sync_position.get():
             self._sync_zoom_scale_bar_position_from_pano()
-        self.debouncer.trigger()
 
-    def on_zoom_scale_bar_pos_change(self):
-        """放大图比例尺位置变化"""
-        if self.scale_bar_sync_position.get():
-            self.debouncer.trigger()
-
-    def select_pano_scale_bar_color(self):
-        """选择全景图比例尺颜色"""
-        current_hex = '#{:02x}{:02x}{:02x}'.format(*self.pano_scale_bar_color)
-        color = colorchooser.askcolor(color=current_hex, title='选择全景图比例尺颜色')
+    def _pick_color(self, attr, preview_widget, title):
+        """通用颜色选择：更新颜色属性、刷新色块并触发预览"""
+        color = colorchooser.askcolor(color=rgb_to_hex(getattr(self, attr)), title=title)
         if color[0]:
-            self.pano_scale_bar_color = tuple(int(c) for c in color[0])
-            self.pano_scale_bar_color_preview.configure(bg=color[1])
+            setattr(self, attr, tuple(int(c) for c in color[0]))
+            self._set_swatch_bg(preview_widget, color[1])
             if self.debouncer:
                 self.debouncer.trigger()
+        return color
+
+    def select_pano_scale_bar_color(self):
+        """选择全景图比例尺颜色"""
+        self._pick_color('pano_scale_bar_color', self.pano_scale_bar_color_preview,
+                         '选择全景图比例尺颜色')
 
     def select_zoom_scale_bar_color(self):
         """选择放大图比例尺颜色"""
-        current_hex = '#{:02x}{:02x}{:02x}'.format(*self.zoom_scale_bar_color)
-        color = colorchooser.askcolor(color=current_hex, title='选择放大图比例尺颜色')
-        if color[0]:
-            self.zoom_scale_bar_color = tuple(int(c) for c in color[0])
-            self.zoom_scale_bar_color_preview.configure(bg=color[1])
-            if self.debouncer:
-                self.debouncer.trigger()
+        self._pick_color('zoom_scale_bar_color', self.zoom_scale_bar_color_preview,
+                         '选择放大图比例尺颜色')
 
     def open_ratio_calculator(self, target):
         """打开像素/μm比例计算器"""
@@ -1240,11 +1673,11 @@ class ROIZoomGUI:
 
     def create_annotation_panel(self, parent):
         """创建标注面板"""
-        panel = CollapsiblePanel(parent, "标注")
+        panel = CollapsiblePanel(parent, "标注", builder=self._build_annotation_panel_content)
         panel.pack(fill=tk.X, pady=(0, 5))
 
-        content = panel.content
-
+    def _build_annotation_panel_content(self, content):
+        """填充标注面板内容（首次展开时调用）"""
         # 工具栏
         tools_frame = ttk.Frame(content)
         tools_frame.pack(fill=tk.X, pady=5)
@@ -1300,10 +1733,8 @@ class ROIZoomGUI:
         color_frame = ttk.Frame(content)
         color_frame.pack(fill=tk.X, pady=5)
         ttk.Label(color_frame, text="颜色:").pack(side=tk.LEFT)
-        self.annotation_color_preview = tk.Canvas(
-            color_frame, width=30, height=20, bg='#ff0000',
-            highlightthickness=1, highlightbackground='gray'
-        )
+        self.annotation_color_preview = self._make_swatch(color_frame, '#ff0000',
+                                                          width=30, height=20)
         self.annotation_color_preview.pack(side=tk.LEFT, padx=5)
         ttk.Button(
             color_frame, text="选择...",
@@ -1332,13 +1763,7 @@ class ROIZoomGUI:
 
     def select_annotation_color(self):
         """选择标注颜色"""
-        current_hex = '#{:02x}{:02x}{:02x}'.format(*self.annotation_color)
-        color = colorchooser.askcolor(color=current_hex, title='选择标注颜色')
-        if color[0]:
-            self.annotation_color = tuple(int(c) for c in color[0])
-            self.annotation_color_preview.configure(bg=color[1])
-            if self.debouncer:
-                self.debouncer.trigger()
+        self._pick_color('annotation_color', self.annotation_color_preview, '选择标注颜色')
 
     def start_adding_annotation(self):
         """开始添加标注模式"""
@@ -1350,14 +1775,36 @@ class ROIZoomGUI:
         self.preview_canvas.configure(cursor='crosshair')
         self.update_status("点击预览图添加标注，按Escape取消")
 
+    @staticmethod
+    def _annotation_row_label(idx, ann):
+        """生成标注列表行文本"""
+        ann_type = ann.get('type', 'unknown')
+        target = ann.get('target', 'zoom')
+        pos = ann.get('position', (0, 0))
+        return f"{idx + 1}. {ann_type} @ {target} ({pos[0]}, {pos[1]})"
+
     def update_annotation_listbox(self):
-        """更新标注列表显示"""
+        """整体重建标注列表（仅撤销/重做等批量变化路径使用）"""
+        if self.annotation_listbox is None:
+            return  # 标注面板尚未展开构建
         self.annotation_listbox.delete(0, tk.END)
         for i, ann in enumerate(self.annotations):
-            ann_type = ann.get('type', 'unknown')
-            target = ann.get('target', 'zoom')
-            pos = ann.get('position', (0, 0))
-            self.annotation_listbox.insert(tk.END, f"{i+1}. {ann_type} @ {target} ({pos[0]}, {pos[1]})")
+            self.annotation_listbox.insert(tk.END, self._annotation_row_label(i, ann))
+
+    def _append_annotation_row(self, ann):
+        """增量追加一行，免去每次添加都整表重建"""
+        if self.annotation_listbox is None:
+            return
+        self.annotation_listbox.insert(tk.END, self._annotation_row_label(len(self.annotations) - 1, ann))
+
+    def _remove_annotation_row(self, idx):
+        """增量删除一行，并重排其后各行的序号"""
+        if self.annotation_listbox is None:
+            return
+        self.annotation_listbox.delete(idx)
+        for i in range(idx, len(self.annotations)):
+            self.annotation_listbox.delete(i)
+            self.annotation_listbox.insert(i, self._annotation_row_label(i, self.annotations[i]))
 
     def delete_selected_annotation(self):
         """删除选中的标注"""
@@ -1366,21 +1813,20 @@ class ROIZoomGUI:
             self.save_state()
             idx = selection[0]
             del self.annotations[idx]
-            self.update_annotation_listbox()
+            self._remove_annotation_row(idx)
             self.debouncer.trigger()
 
     def create_watermark_panel(self, parent):
         """创建水印面板"""
-        panel = CollapsiblePanel(parent, "水印")
+        panel = CollapsiblePanel(parent, "水印", builder=self._build_watermark_panel_content)
         panel.pack(fill=tk.X, pady=(0, 5))
 
-        content = panel.content
-
+    def _build_watermark_panel_content(self, content):
+        """填充水印面板内容（首次展开时调用）"""
         # 启用复选框
         ttk.Checkbutton(
             content, text="启用水印",
-            variable=self.watermark_enabled,
-            command=lambda: self.debouncer.trigger()
+            variable=self.watermark_enabled
         ).pack(anchor=tk.W)
 
         # 文字输入
@@ -1394,21 +1840,11 @@ class ROIZoomGUI:
         pos_frame.pack(fill=tk.X, pady=5)
         ttk.Label(pos_frame, text="位置:").pack(side=tk.LEFT)
 
-        positions = [
-            ('右下', 'bottom-right'),
-            ('左下', 'bottom-left'),
-            ('右上', 'top-right'),
-            ('左上', 'top-left'),
-            ('居中', 'center'),
-        ]
         pos_combo = ttk.Combobox(
             pos_frame, textvariable=self.watermark_position,
-            values=[p[0] for p in positions], state='readonly', width=8
+            values=[p[0] for p in _WATERMARK_POSITIONS], state='readonly', width=8
         )
         pos_combo.pack(side=tk.LEFT, padx=5)
-        # 设置映射
-        self.watermark_position_map = {p[0]: p[1] for p in positions}
-        self.watermark_position_map_reverse = {p[1]: p[0] for p in positions}
 
         # 透明度
         opacity_frame = ttk.Frame(content)
@@ -1419,7 +1855,7 @@ class ROIZoomGUI:
         ttk.Scale(
             opacity_frame, from_=0, to=255,
             variable=self.watermark_opacity, orient=tk.HORIZONTAL,
-            command=lambda v: self.opacity_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.opacity_label)
         ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
         # 字体大小
@@ -1435,10 +1871,8 @@ class ROIZoomGUI:
         color_frame = ttk.Frame(content)
         color_frame.pack(fill=tk.X, pady=5)
         ttk.Label(color_frame, text="颜色:").pack(side=tk.LEFT)
-        self.watermark_color_preview = tk.Canvas(
-            color_frame, width=30, height=20, bg='#808080',
-            highlightthickness=1, highlightbackground='gray'
-        )
+        self.watermark_color_preview = self._make_swatch(color_frame, '#808080',
+                                                         width=30, height=20)
         self.watermark_color_preview.pack(side=tk.LEFT, padx=5)
         ttk.Button(
             color_frame, text="选择...",
@@ -1447,13 +1881,7 @@ class ROIZoomGUI:
 
     def select_watermark_color(self):
         """选择水印颜色"""
-        current_hex = '#{:02x}{:02x}{:02x}'.format(*self.watermark_color)
-        color = colorchooser.askcolor(color=current_hex, title='选择水印颜色')
-        if color[0]:
-            self.watermark_color = tuple(int(c) for c in color[0])
-            self.watermark_color_preview.configure(bg=color[1])
-            if self.debouncer:
-                self.debouncer.trigger()
+        self._pick_color('watermark_color', self.watermark_color_preview, '选择水印颜色')
 
     def create_status_bar(self, parent):
         """创建状态栏"""
@@ -1525,16 +1953,14 @@ class ROIZoomGUI:
         ttk.Label(roi_frame, text="X:").pack(side=tk.LEFT, padx=(10, 2))
         roi_x_spin = ttk.Spinbox(
             roi_frame, from_=-500, to=500, width=6,
-            textvariable=self.roi_offset_x,
-            command=lambda: self.debouncer.trigger()
+            textvariable=self.roi_offset_x
         )
         roi_x_spin.pack(side=tk.LEFT)
 
         ttk.Label(roi_frame, text="Y:").pack(side=tk.LEFT, padx=(10, 2))
         roi_y_spin = ttk.Spinbox(
             roi_frame, from_=-500, to=500, width=6,
-            textvariable=self.roi_offset_y,
-            command=lambda: self.debouncer.trigger()
+            textvariable=self.roi_offset_y
         )
         roi_y_spin.pack(side=tk.LEFT)
 
@@ -1592,27 +2018,34 @@ class ROIZoomGUI:
         h_scrollbar = ttk.Scrollbar(preview_frame, orient=tk.HORIZONTAL, command=self.preview_canvas.xview)
         h_scrollbar.pack(fill=tk.X)
 
-        self.preview_canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        # 滚动条回调顺带安排切片刷新：滚轮/拖动/滚动条/scan
+        # 任何方式移动视口都会经过 scrollcommand
+        self.preview_canvas.configure(
+            yscrollcommand=lambda f, l: (v_scrollbar.set(f, l),
+                                         self._schedule_tile_refresh()),
+            xscrollcommand=lambda f, l: (h_scrollbar.set(f, l),
+                                         self._schedule_tile_refresh()),
+        )
+        self.preview_canvas.bind('<Configure>', self._schedule_tile_refresh)
+        self.preview_canvas.bind('<Map>', self._on_preview_mapped)
 
-        # 绑定预览区域滚动
-        self.preview_canvas.bind('<Enter>', self._bind_preview_scroll)
-        self.preview_canvas.bind('<Leave>', self._unbind_preview_scroll)
-        
         # 拖拽状态
         self._is_dragging = False
         self._drag_start_x = 0
         self._drag_start_y = 0
 
         # 初始提示文字
-        self.preview_canvas.create_text(
+        # 提示文字与图像各占一个常驻画布项，之后只 itemconfigure 切换
+        self._hint_item = self.preview_canvas.create_text(
             200, 150,
             text="生成的图像将在此处预览\n\n请先选择全景图和放大图，\n然后点击\"生成预览\"按钮",
             font=('Helvetica', 12),
             fill='#666666',
             justify=tk.CENTER
         )
+        self._image_item = self.preview_canvas.create_image(
+            0, 0, anchor=tk.NW, state='hidden')
         self.preview_canvas.configure(scrollregion=(0, 0, 400, 300))
-        self.preview_scale = 1.0
 
     def on_left_down(self, event):
         """左键按下"""
@@ -1641,44 +2074,18 @@ class ROIZoomGUI:
             self.on_drag_move(event)
             self.preview_canvas.configure(cursor='fleur')
 
-    def _bind_preview_scroll(self, event):
-        """绑定预览面板滚动"""
-        # 注意：这里我们使用 bind_all 确保在画布区域内滚动生效，但仅当鼠标在画布上时
-        if platform.system() == 'Darwin':
-            self.preview_canvas.bind_all("<MouseWheel>", self._on_preview_mousewheel)
-        else:
-            self.preview_canvas.bind_all("<MouseWheel>", self._on_preview_mousewheel)
-            self.preview_canvas.bind_all("<Button-4>", lambda e: self.preview_canvas.yview_scroll(-1, "units"))
-            self.preview_canvas.bind_all("<Button-5>", lambda e: self.preview_canvas.yview_scroll(1, "units"))
-
-    def _unbind_preview_scroll(self, event):
-        """解绑预览面板滚动"""
-        if platform.system() == 'Darwin':
-            self.preview_canvas.unbind_all("<MouseWheel>")
-        else:
-            self.preview_canvas.unbind_all("<MouseWheel>")
-            self.preview_canvas.unbind_all("<Button-4>")
-            self.preview_canvas.unbind_all("<Button-5>")
-
     def _on_preview_mousewheel(self, event):
         """处理预览面板滚动"""
         # 如果按住了 Command/Control 键，则由缩放处理程序处理（不在此处理）
         state = event.state
-        # macOS Command键通常是 8 或 16 (取决于具体修饰键组合)
-        # Windows Control键是 4
-        is_ctrl_cmd = (state & 4) or (state & 8) or (state & 16)
-        
-        if is_ctrl_cmd:
+        if state & _CTRLCMD_MASK:
             return  # 交给 zoom handler
 
         # 检查是否按住 Shift 键进行水平滚动
-        is_shift = (state & 1)
-        
-        if platform.system() == 'Darwin':
-            delta = int(-1 * event.delta)
-        else:
-            delta = int(-1 * (event.delta / 120))
-            
+        is_shift = state & _SHIFT_MASK
+
+        delta = self._wheel_delta(event)
+
         if is_shift:
             self.preview_canvas.xview_scroll(delta, "units")
         else:
@@ -1713,11 +2120,36 @@ class ROIZoomGUI:
             self.update_thumbnail(path, self.zoom_thumb_label)
 
     def update_thumbnail(self, image_path, label, max_size=(200, 100)):
-        """更新缩略图显示"""
+        """更新缩略图显示（带缓存）"""
         try:
-            img = Image.open(image_path)
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
+            try:
+                mtime = os.path.getmtime(image_path)
+            except OSError:
+                mtime = None
+            key = (image_path, mtime, max_size)
+
+            photo = self._thumb_cache.pop(key, None)
+            if photo is None:
+                img = Image.open(image_path)
+                # JPEG 支持解码期粗缩（draft），直接少解码最多 4 倍像素；
+                # 留 2 倍余量给 LANCZOS 保证质量
+                img.draft('RGB', (max_size[0] * 2, max_size[1] * 2))
+                if img.mode in ('P', '1'):
+                    img = img.convert('RGB')
+                # 先用 C 实现的整数因子 box 滤波粗缩，
+                # LANCZOS 只处理小得多的中间图（约 3-5x 提速）
+                factor = max(1, min(img.width // max_size[0],
+                                    img.height // max_size[1]) // 2)
+                if factor > 1:
+                    img = img.reduce(factor)
+                img.thumbnail(max_size, Image.Resampling.LANCZOS)
+                photo = ImageTk.PhotoImage(img)
+
+            # 重新插入实现 LRU：命中项移到末尾，超额时淘汰最旧项
+            self._thumb_cache[key] = photo
+            while len(self._thumb_cache) > self._thumb_cache_size:
+                self._thumb_cache.pop(next(iter(self._thumb_cache)))
+
             label.configure(image=photo, text='')
             label.image = photo  # 保持引用
         except Exception as e:
@@ -1725,20 +2157,9 @@ class ROIZoomGUI:
 
     def select_color(self):
         """打开颜色选择器"""
-        # 将当前颜色转换为十六进制
-        current_hex = '#{:02x}{:02x}{:02x}'.format(*self.color_var)
-
-        color = colorchooser.askcolor(
-            color=current_hex,
-            title='选择颜色'
-        )
-
+        color = self._pick_color('color_var', self.color_preview, '选择颜色')
         if color[0]:  # color[0] 是 RGB 元组，color[1] 是十六进制
-            self.color_var = tuple(int(c) for c in color[0])
-            self.color_preview.configure(bg=color[1])
             self.color_hex_label.configure(text=color[1].upper())
-            if self.debouncer:
-                self.debouncer.trigger()
 
     def generate_preview(self):
         """生成预览图像"""
@@ -1757,23 +2178,83 @@ class ROIZoomGUI:
             messagebox.showerror("错误", f"放大图文件不存在: {self.zoom_path.get()}")
             return
 
-        # 更新状态
+        # 已有渲染在途时只记一个待办标记，完成后再补一次
+        if self._generating:
+            self._regenerate_pending = True
+            return
+
+        # 更新状态：update_idletasks 只刷新界面，
+        # 不像 update() 那样重入整个事件循环
         self.update_status("正在生成...")
         self.generate_btn.configure(state=tk.DISABLED)
-        self.root.update()
+        self.root.update_idletasks()
 
         try:
-            self._cleanup_temp_output()
-
-            # 创建临时输出文件
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                self.temp_output_path = tmp_file.name
-
-            result = create_zoom_figure(**self._build_render_kwargs(
+            # 预览结果只在内存使用，不落盘
+            kwargs = self._build_render_kwargs(
                 self.panorama_path.get(),
                 self.zoom_path.get(),
-                self.temp_output_path,
-            ))
+                None,
+            )
+
+            # 渲染比例与画布尺寸涉及 Tk 调用，必须在主线程取好；
+            # 状态键也在提交前捕获——完成回调要记录实际渲染时的状态，
+            # 渲染途中用户再改参数不能污染缓存键
+            render_key = self._render_state_key()
+            with Image.open(self.panorama_path.get()) as pano_probe:
+                render_scale = self._compute_preview_render_scale(pano_probe.size)
+            draft_target = max(self._preview_canvas_size()) * 2
+        except Exception as e:
+            self._last_render_key = None
+            messagebox.showerror("生成失败", f"生成图像时出错:\n{str(e)}")
+            self.update_status("生成失败")
+            self.generate_btn.configure(state=tk.NORMAL)
+            return
+
+        # 合成在工作线程执行，主线程继续响应交互
+        self._generating = True
+        self._pool.submit(self._render_preview_worker, kwargs, render_scale,
+                          draft_target, render_key)
+
+    def _render_preview_worker(self, kwargs, render_scale, draft_target, render_key):
+        """工作线程：降采样代理 + 合成渲染，不触碰任何 Tk 控件"""
+        result = None
+        error = None
+        try:
+            # 预览按屏幕分辨率渲染：降采样输入并等比缩放几何参数；
+            # 代理图直接以内存对象传入渲染，不再经临时 PNG 往返
+            if render_scale < 1.0:
+                for src_key in ('panorama_path', 'zoom_path'):
+                    with Image.open(kwargs[src_key]) as probe:
+                        new_size = (max(1, int(probe.width * render_scale)),
+                                    max(1, int(probe.height * render_scale)))
+                    with self._open_preview_source(kwargs[src_key], draft_target) as src:
+                        kwargs[src_key] = src.convert('RGB').resize(
+                            new_size, Image.Resampling.BILINEAR)
+                kwargs = self._scale_render_kwargs(kwargs, render_scale)
+
+            result = create_zoom_figure(**kwargs)
+        except Exception as e:
+            error = e
+
+        # 结果交回主线程处理；窗口销毁后静默丢弃
+        try:
+            self.root.after(0, self._on_preview_rendered,
+                            result, render_scale, error, render_key)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _on_preview_rendered(self, result, render_scale, error, render_key):
+        """主线程回收渲染结果并刷新界面"""
+        self._generating = False
+        self.generate_btn.configure(state=tk.NORMAL)
+
+        if error is not None:
+            self._last_render_key = None
+            messagebox.showerror("生成失败", f"生成图像时出错:\n{str(error)}")
+            self.update_status("生成失败")
+        else:
+            self._preview_render_scale = render_scale
 
             # 返回元组 (image, metadata)
             if isinstance(result, tuple):
@@ -1785,23 +2266,46 @@ class ROIZoomGUI:
             # 显示预览
             self.show_preview(self.result_image)
 
+            # 记录本次渲染状态并缓存结果（用提交时捕获的键，
+            # 不按完成时刻的界面状态重算）
+            self._last_render_key = render_key
+            self._render_cache[self._last_render_key] = (
+                self.result_image, self.metadata, self._preview_render_scale)
+            while len(self._render_cache) > self._render_cache_size:
+                evicted = self._render_cache.pop(next(iter(self._render_cache)))[0]
+                # 淘汰即关闭，像素内存立刻归还而不必等 GC；
+                # 正在显示的那张除外
+                if evicted is not None and evicted is not self.result_image:
+                    evicted.close()
+
             # 启用保存按钮
             self.save_btn.configure(state=tk.NORMAL)
             self.update_status("生成完成")
 
-        except Exception as e:
-            messagebox.showerror("生成失败", f"生成图像时出错:\n{str(e)}")
-            self.update_status("生成失败")
-        finally:
-            self._cleanup_temp_output()
-            self.generate_btn.configure(state=tk.NORMAL)
+        # 在途期间又有参数变化：补排一次防抖预览
+        if self._regenerate_pending:
+            self._regenerate_pending = False
+            self.debouncer.trigger()
 
     def show_preview(self, image, zoom_percent=None):
         """在预览区域显示图像（支持缩放和滚动）"""
-        # 清除画布
-        self.preview_canvas.delete("all")
-
-        # 保存原始图像
+        # 画布当前不可见时记下图像，映射回来再显示，
+        # 省掉对不可见内容的重采样和位图转换
+        if not self.preview_canvas.winfo_viewable():
+            self._pending_preview = image
+            return
+        self._pending_preview = None
+
+        # 隐藏提示文字（画布项常驻，不删除重建）
+        self.preview_canvas.itemconfigure(self._hint_item, state='hidden')
+
+        # 保存原始图像；换图时作废金字塔与尺寸缓存
+        if self.preview_original_image is not image:
+            self._preview_pyramid = None
+            for stale in self._display_cache.values():
+                stale.close()
+            self._display_cache.clear()
+            self._last_displayed = None
         self.preview_original_image = image
 
         # 图像原始尺寸
@@ -1818,34 +2322,148 @@ class ROIZoomGUI:
         display_width = int(img_width * scale)
         display_height = int(img_height * scale)
 
-        # 缩放图像
-        if scale != 1.0:
-            display_image = image.resize((display_width, display_height), Image.Resampling.LANCZOS)
+        # 设置滚动区域
+        self.preview_canvas.configure(scrollregion=(0, 0, display_width, display_height))
+
+        # 放大查看只渲染可见视口切片：400% 下不再生成
+        # zoom² 倍的整图缓冲，内存与视口尺寸成正比
+        if scale > 1.0:
+            self._render_viewport_tile(image, scale, display_width, display_height)
+            self.zoom_label.configure(text=f"{int(zoom_percent)}%")
+            return
+
+        # 缩放图像：缩小时取金字塔就近层级做 BILINEAR；
+        # 同一结果图在相同目标尺寸下的重采样结果直接复用
+        if scale < 1.0:
+            display_image = self._display_cache.get((display_width, display_height))
+            if display_image is None:
+                src = self._pyramid_level(image, scale)
+                display_image = src.resize((display_width, display_height),
+                                           Image.Resampling.BILINEAR)
+                if scale < 0.5:
+                    # 低倍率下肉眼分不出真彩与 256 色的差别，
+                    # 量化后送往 Tk 的像素量降为 1 字节/像素
+                    display_image = display_image.quantize(
+                        colors=256, method=Image.Quantize.FASTOCTREE)
+                self._display_cache[(display_width, display_height)] = display_image
+                while len(self._display_cache) > 4:
+                    self._display_cache.pop(next(iter(self._display_cache))).close()
         else:
             display_image = image
 
-        # 转换为 PhotoImage
-        photo = ImageTk.PhotoImage(display_image)
-
-        # 设置滚动区域
-        self.preview_canvas.configure(scrollregion=(0, 0, display_width, display_height))
+        # 同一对象同尺寸重复显示（如点了不改图的选项）时，
+        # 位图内容没变，跳过向 Tk 的整幅像素重传
+        displayed = (id(display_image), display_image.size)
+        if displayed == self._last_displayed and self._preview_photo is not None:
+            self.preview_canvas.itemconfigure(self._image_item, state='normal')
+            self.zoom_label.configure(text=f"{int(zoom_percent)}%")
+            return
 
-        # 显示图像
-        self.preview_canvas.create_image(0, 0, anchor=tk.NW, image=photo)
-        self.preview_canvas.image = photo  # 保持引用
+        # 显示图像：复用常驻画布项（_preview_photo 已持有引用）
+        photo = self._to_photo(display_image)
+        self._last_displayed = displayed
+        self.preview_canvas.coords(self._image_item, 0, 0)
+        self.preview_canvas.itemconfigure(self._image_item, image=photo, state='normal')
 
         # 更新缩放标签
         self.zoom_label.configure(text=f"{int(zoom_percent)}%")
 
+    def _to_photo(self, display_image):
+        """PIL 图转 PhotoImage：尺寸未变时原地 paste，否则重建
+
+        重建前先释放旧句柄，任何时刻最多只存在一份 Tk 位图。
+        """
+        photo = self._preview_photo
+        if (photo is None
+                or (photo.width(), photo.height()) != display_image.size):
+            self._preview_photo = None
+            del photo
+            photo = ImageTk.PhotoImage(display_image)
+            self._preview_photo = photo
+        else:
+            photo.paste(display_image)
+        return photo
+
+    def _render_viewport_tile(self, image, scale, display_width, display_height):
+        """裁出视口可见区域对应的原图切片并放大显示
+
+        切片四周多渲染半个视口的余量，小幅拖动先露出
+        已渲染内容，刷新只在停顿后补一次。
+        """
+        canvas = self.preview_canvas
+        vw = max(canvas.winfo_width(), 1)
+        vh = max(canvas.winfo_height(), 1)
+        vx0 = max(0, int(canvas.canvasx(0)) - vw // 2)
+        vy0 = max(0, int(canvas.canvasy(0)) - vh // 2)
+        vx1 = min(display_width, vx0 + 2 * vw)
+        vy1 = min(display_height, vy0 + 2 * vh)
+        if vx1 <= vx0 or vy1 <= vy0:
+            return
+
+        # 映射回原图坐标，裁剪后只放大这一小块
+        sx0 = int(vx0 / scale)
+        sy0 = int(vy0 / scale)
+        sx1 = min(image.width, int(math.ceil(vx1 / scale)))
+        sy1 = min(image.height, int(math.ceil(vy1 / scale)))
+        # 交互路径用 BICUBIC：放大场景下与 LANCZOS 肉眼难辨，
+        # 但核宽减半，切片刷新快得多
+        tile = image.crop((sx0, sy0, sx1, sy1))
+        tile = tile.resize((vx1 - vx0, vy1 - vy0), Image.Resampling.BICUBIC)
+
+        photo = self._to_photo(tile)
+        # 切片覆写了位图内容，作废整图显示的重传跳过标记
+        self._last_displayed = None
+        canvas.coords(self._image_item, vx0, vy0)
+        canvas.itemconfigure(self._image_item, image=photo, state='normal')
+
+    def _on_preview_mapped(self, event=None):
+        """画布重新可见时补显示挂起的预览"""
+        pending = self._pending_preview
+        if pending is not None:
+            self._pending_preview = None
+            self.show_preview(pending)
+
+    def _schedule_tile_refresh(self, *args):
+        """视口移动/画布改尺寸后轻量刷新切片（仅放大模式需要）"""
+        if self.preview_scale <= 1.0 or self.preview_original_image is None:
+            return
+        if self._tile_job is not None:
+            self.root.after_cancel(self._tile_job)
+        self._tile_job = self.root.after(40, self._refresh_viewport_tile)
+
+    def _refresh_viewport_tile(self):
+        self._tile_job = None
+        image = self.preview_original_image
+        scale = self.preview_scale
+        if image is None or scale <= 1.0:
+            return
+        self._render_viewport_tile(image, scale,
+                                   int(image.width * scale), int(image.height * scale))
+
+    def _pyramid_level(self, image, scale):
+        """返回金字塔中不小于目标尺寸的最近层级
+
+        金字塔每张结果图只构建一次（reduce 是 C 实现的 box 滤波），
+        之后各缩放档位共享。
+        """
+        pyramid = self._preview_pyramid
+        if pyramid is None or pyramid[0] is not image:
+            pyramid = [image]
+            while pyramid[-1].width > 64 and pyramid[-1].height > 64 and len(pyramid) < 6:
+                pyramid.append(pyramid[-1].reduce(2))
+            self._preview_pyramid = pyramid
+        level = min(len(pyramid) - 1, max(0, int(math.log2(1.0 / scale))))
+        return pyramid[level]
+
     def set_preview_zoom(self, zoom_percent):
         """设置预览缩放比例"""
         self.preview_zoom_var.set(zoom_percent)
-        if hasattr(self, 'preview_original_image') and self.preview_original_image:
+        if self.preview_original_image:
             self.show_preview(self.preview_original_image, zoom_percent)
 
     def fit_preview_to_canvas(self):
         """适应画布大小"""
-        if not hasattr(self, 'preview_original_image') or not self.preview_original_image:
+        if not self.preview_original_image:
             return
 
         canvas_width = self.preview_canvas.winfo_width()
@@ -1867,8 +2485,12 @@ class ROIZoomGUI:
         self.preview_canvas.scan_dragto(event.x, event.y, gain=1)
 
     def on_zoom_wheel(self, event):
-        """滚轮缩放"""
-        if not hasattr(self, 'preview_original_image') or not self.preview_original_image:
+        """滚轮缩放
+
+        连续滚动时只更新数值显示，重采样合并到 40ms 后执行一次，
+        一个手势里的 N 个刻度只付一次缩放成本。
+        """
+        if not self.preview_original_image:
             return
 
         current_zoom = self.preview_zoom_var.get()
@@ -1879,14 +2501,25 @@ class ROIZoomGUI:
         else:
             new_zoom = max(current_zoom / 1.2, 10)
 
-        self.set_preview_zoom(new_zoom)
+        self.preview_zoom_var.set(new_zoom)
+        self.zoom_label.configure(text=f"{int(new_zoom)}%")
+
+        if self._zoom_job is not None:
+            self.root.after_cancel(self._zoom_job)
+        self._zoom_job = self.root.after(40, self._apply_wheel_zoom)
+
+    def _apply_wheel_zoom(self):
+        """滚轮手势停顿后执行实际重采样"""
+        self._zoom_job = None
+        if self.preview_original_image:
+            self.show_preview(self.preview_original_image, self.preview_zoom_var.get())
 
     def on_canvas_click(self, event):
         """处理画布点击事件（释放时触发）"""
         self.preview_canvas.configure(cursor='')  # Reset cursor
         
         # 如果刚才发生了拖拽，则忽略这次点击
-        if hasattr(self, '_is_dragging') and self._is_dragging:
+        if self._is_dragging:
             self._is_dragging = False
             return
             
@@ -1897,13 +2530,10 @@ class ROIZoomGUI:
         canvas_x = self.preview_canvas.canvasx(event.x)
         canvas_y = self.preview_canvas.canvasy(event.y)
 
-        # 转换为图像坐标
-        if hasattr(self, 'preview_scale') and self.preview_scale:
-            img_x = int(canvas_x / self.preview_scale)
-            img_y = int(canvas_y / self.preview_scale)
-        else:
-            img_x = int(canvas_x)
-            img_y = int(canvas_y)
+        # 转换为图像坐标（preview_scale 在 __init__ 中预置，无需 hasattr）
+        scale = self.preview_scale or 1.0
+        img_x = int(canvas_x / scale)
+        img_y = int(canvas_y / scale)
 
         # 确定是在全景图还是放大图区域
         if self.metadata:
@@ -1920,7 +2550,14 @@ class ROIZoomGUI:
                 rel_x = img_x - zoom_pos[0]
                 rel_y = img_y - zoom_pos[1]
 
-            # 创建标注
+            # 预览可能是降采样渲染的，标注坐标按全分辨率保存
+            render_scale = self._preview_render_scale or 1.0
+            if render_scale < 1.0:
+                rel_x = int(round(rel_x / render_scale))
+                rel_y = int(round(rel_y / render_scale))
+
+            # 创建标注（记录创建后视为不可变，修改=删除后重建；
+            # 这样历史快照只复制列表骨架即可）
             annotation = {
                 'type': self.current_annotation_tool.get(),
                 'position': (rel_x, rel_y),
@@ -1933,7 +2570,7 @@ class ROIZoomGUI:
 
             self.save_state()
             self.annotations.append(annotation)
-            self.update_annotation_listbox()
+            self._append_annotation_row(annotation)
 
             # 退出添加模式
             self.adding_annotation = False
@@ -1943,14 +2580,41 @@ class ROIZoomGUI:
             # 重新生成预览
             self.debouncer.trigger()
 
+    def _render_full_resolution(self):
+        """以全分辨率重新渲染（导出用，结果留在内存由导出对话框落盘）"""
+        result = create_zoom_figure(**self._build_render_kwargs(
+            self.panorama_path.get(),
+            self.zoom_path.get(),
+            None,
+        ))
+        return result[0] if isinstance(result, tuple) else result
+
     def save_image(self):
         """打开导出对话框"""
         if self.result_image is None:
             messagebox.showerror("错误", "没有可保存的图像，请先生成预览")
             return
 
-        # 打开导出对话框，传递GUI实例以保存设置
-        ExportDialog(self.root, self.result_image, self.panorama_path.get(), self)
+        # 预览是降采样渲染时，导出前按全分辨率重新生成
+        export_image = self.result_image
+        if self._preview_render_scale < 1.0:
+            self.update_status("正在生成全分辨率图像...")
+            self.root.update_idletasks()
+            try:
+                export_image = self._render_full_resolution()
+            except Exception as e:
+                messagebox.showerror("导出失败", f"生成全分辨率图像时出错:\n{str(e)}")
+                self.update_status()
+                return
+            self.update_status()
+
+        # 打开导出对话框，传递GUI实例以保存设置；
+        # 实例隐藏复用，重复打开不再重建十几个 ttk 组件
+        if self._export_dialog is None or not self._export_dialog.dialog.winfo_exists():
+            self._export_dialog = ExportDialog(self.root, export_image,
+                                               self.panorama_path.get(), self)
+        else:
+            self._export_dialog.reset(export_image, self.panorama_path.get())
 
     def open_batch_dialog(self):
         """打开批量处理对话框"""
@@ -1973,6 +2637,7 @@ class ExportDialog:
         self.dialog.minsize(400, 450)
         self.dialog.transient(parent)
         self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
 
         # 变量 - 使用GUI实例中保存的值
         if gui_instance:
@@ -2002,8 +2667,10 @@ class ExportDialog:
         info_frame.pack(fill=tk.X, pady=(0, 10))
 
         width, height = self.image.size
-        ttk.Label(info_frame, text=f"尺寸: {width} x {height} 像素").pack(anchor=tk.W)
-        ttk.Label(info_frame, text=f"模式: {self.image.mode}").pack(anchor=tk.W)
+        self.size_label = ttk.Label(info_frame, text=f"尺寸: {width} x {height} 像素")
+        self.size_label.pack(anchor=tk.W)
+        self.mode_label = ttk.Label(info_frame, text=f"模式: {self.image.mode}")
+        self.mode_label.pack(anchor=tk.W)
 
         # 格式选择
         format_frame = ttk.LabelFrame(main_frame, text="导出格式", padding="10")
@@ -2055,13 +2722,14 @@ class ExportDialog:
         quality_inner.pack(fill=tk.X)
 
         ttk.Label(quality_inner, text="质量 (1-100):").pack(side=tk.LEFT)
+        # 数值标签先于滑块创建，_int_label_updater 构造时就要用到它
+        self.quality_label = ttk.Label(quality_inner, text="95", width=4)
         quality_scale = ttk.Scale(
             quality_inner, from_=1, to=100,
             variable=self.quality_var, orient=tk.HORIZONTAL,
-            command=lambda v: self.quality_label.configure(text=str(int(float(v))))
+            command=_int_label_updater(self.quality_label)
         )
         quality_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
-        self.quality_label = ttk.Label(quality_inner, text="95", width=4)
         self.quality_label.pack(side=tk.LEFT)
 
         # 按钮容器（固定在底部）
@@ -2069,11 +2737,27 @@ class ExportDialog:
         self.btn_frame.pack(fill=tk.X, pady=(20, 0), side=tk.BOTTOM)
 
         ttk.Button(self.btn_frame, text="导出", command=self.export).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(self.btn_frame, text="取消", command=self.dialog.destroy).pack(side=tk.RIGHT)
+        ttk.Button(self.btn_frame, text="取消", command=self.close).pack(side=tk.RIGHT)
 
         # 根据当前导出格式初始化质量面板显示状态
         self.toggle_quality()
 
+    def reset(self, image, source_path):
+        """更新图像与信息后重新显示隐藏的对话框实例"""
+        self.image = image
+        self.source_path = source_path
+        width, height = image.size
+        self.size_label.configure(text=f"尺寸: {width} x {height} 像素")
+        self.mode_label.configure(text=f"模式: {image.mode}")
+        self.toggle_quality()
+        self.dialog.deiconify()
+        self.dialog.grab_set()
+
+    def close(self):
+        """隐藏而不销毁，下次打开直接复用已建好的组件"""
+        self.dialog.grab_release()
+        self.dialog.withdraw()
+
     def toggle_quality(self):
         """切换 JPEG 质量选项显示"""
         if self.format_var.get() == 'JPEG':
@@ -2118,26 +2802,25 @@ class ExportDialog:
 
         if save_path:
             try:
-                # 准备保存参数
-                save_kwargs = {'dpi': (dpi, dpi)}
+                # 各格式额外保存参数；PNG 取低压缩档换编码速度（仍为无损）
+                format_opts = {
+                    'PNG': {'compress_level': 1},
+                    'JPEG': {'quality': self.quality_var.get()},
+                    'TIFF': {},
+                    'BMP': {},
+                }
+                # BMP 不支持 DPI 元数据
+                save_kwargs = {} if fmt == 'BMP' else {'dpi': (dpi, dpi)}
+                save_kwargs.update(format_opts[fmt])
 
-                if fmt == 'PNG':
-                    self.image.save(save_path, 'PNG', **save_kwargs)
-                elif fmt == 'JPEG':
+                image = self.image
+                if fmt == 'JPEG' and image.mode != 'RGB':
                     # JPEG 不支持透明，转换为 RGB
-                    if self.image.mode in ('RGBA', 'LA', 'P'):
-                        rgb_image = self.image.convert('RGB')
-                        rgb_image.save(save_path, 'JPEG', quality=self.quality_var.get(), **save_kwargs)
-                    else:
-                        self.image.save(save_path, 'JPEG', quality=self.quality_var.get(), **save_kwargs)
-                elif fmt == 'TIFF':
-                    self.image.save(save_path, 'TIFF', **save_kwargs)
-                elif fmt == 'BMP':
-                    # BMP 不支持 DPI 元数据，直接保存
-                    self.image.save(save_path, 'BMP')
+                    image = image.convert('RGB')
+                image.save(save_path, fmt, **save_kwargs)
 
                 messagebox.showinfo("导出成功", f"图像已导出到:\n{save_path}\n\n格式: {fmt}\nDPI: {dpi}")
-                self.dialog.destroy()
+                self.close()
 
             except Exception as e:
                 messagebox.showerror("导出失败", f"导出图像时出错:\n{str(e)}")
@@ -2152,9 +2835,11 @@ class BatchProcessDialog:
         self.file_pairs = []  # [(panorama_path, zoom_path), ...]
         self.processing = False
         self._process_job = None
-        self._current_index = 0
+        self._done_count = 0
         self._success = 0
         self._failed = 0
+        self._executor = None
+        self._futures = {}
 
         # 创建对话框窗口
         self.dialog = tk.Toplevel(parent)
@@ -2315,12 +3000,15 @@ class BatchProcessDialog:
         if not folder:
             return
 
-        # 获取所有图像文件
-        image_extensions = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'}
+        # 获取所有图像文件：scandir 单次遍历，
+        # 用目录项自带的类型信息省去逐文件 stat
         files = []
-        for f in Path(folder).iterdir():
-            if f.suffix.lower() in image_extensions:
-                files.append(f)
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if os.path.splitext(entry.name)[1].lower() in _IMAGE_EXTS:
+                    files.append(Path(entry.path))
 
         if not files:
             messagebox.showwarning("警告", "文件夹中没有找到图像文件")
@@ -2337,10 +3025,10 @@ class BatchProcessDialog:
             for f in files:
                 name = f.stem.lower()
                 if '10x' in name or '4x' in name or '5x' in name:
-                    key = re.sub(r'_?\d+x', '', name)
+                    key = _MAG_SUFFIX_RE.sub('', name)
                     low_mag[key] = f
                 elif '40x' in name or '20x' in name or '100x' in name:
-                    key = re.sub(r'_?\d+x', '', name)
+                    key = _MAG_SUFFIX_RE.sub('', name)
                     high_mag[key] = f
 
             for key in low_mag:
@@ -2354,10 +3042,10 @@ class BatchProcessDialog:
             for f in files:
                 name = f.stem.lower()
                 if 'pano' in name or 'panorama' in name or 'overview' in name:
-                    key = re.sub(r'_?(pano|panorama|overview)', '', name)
+                    key = _PANO_TOKEN_RE.sub('', name)
                     pano_files[key] = f
                 elif 'zoom' in name or 'detail' in name or 'magnif' in name:
-                    key = re.sub(r'_?(zoom|detail|magnif\w*)', '', name)
+                    key = _ZOOM_TOKEN_RE.sub('', name)
                     zoom_files[key] = f
 
             for key in pano_files:
@@ -2424,13 +3112,18 @@ class BatchProcessDialog:
         return key.strip().lower(), kind.strip().lower()
 
     def remove_selected(self):
-        """删除选中的文件对"""
-        selected = self.tree.selection()
-        for item in selected:
-            idx = self.tree.index(item)
-            self.tree.delete(item)
-            if idx < len(self.file_pairs):
-                del self.file_pairs[idx]
+        """删除选中的文件对
+
+        逐项 index()+del 是 O(N·n)；按行序对齐一次过滤，
+        再把选中项一次性删掉。
+        """
+        selected = set(self.tree.selection())
+        if not selected:
+            return
+        children = self.tree.get_children()
+        self.file_pairs = [pair for item, pair in zip(children, self.file_pairs)
+                           if item not in selected]
+        self.tree.delete(*selected)
 
     def clear_list(self):
         """清空列表"""
@@ -2454,72 +3147,101 @@ class BatchProcessDialog:
             return
 
         self.processing = True
-        self._current_index = 0
+        self._done_count = 0
         self._success = 0
         self._failed = 0
 
+        total = len(self.file_pairs)
         self.progress_var.set(0)
-        self.progress_label.configure(text=f"处理中: 0/{len(self.file_pairs)}")
+        self.progress_label.configure(text=f"处理中: 0/{total}")
 
         for item in self.tree.get_children():
             self.tree.set(item, 'status', '待处理')
 
+        ext_map = {'PNG': '.png', 'JPEG': '.jpg', 'TIFF': '.tif'}
+        ext = ext_map.get(self.output_format.get(), '.png')
+
+        # Tk 变量不能进子进程，先在主线程把每对的渲染参数算好；
+        # 渲染设置整批不变，几十个变量只读一次，循环里仅替换路径
+        base_kwargs = self.gui._build_render_kwargs(None, None, None)
+        naming = self.naming_pattern.get()
+        out_dir = Path(self.output_dir.get())
+        jobs = []
+        for i, (pano, zoom) in enumerate(self.file_pairs):
+            output_name = naming.replace('{name}', Path(pano).stem) + ext
+            jobs.append((i, dict(base_kwargs,
+                                 panorama_path=pano,
+                                 zoom_path=zoom,
+                                 output_path=str(out_dir / output_name))))
+
+        # 各文件对相互独立，用进程池并行合成。
+        # 完成回调只往队列塞 future，界面轮询按量排空，
+        # 不必每 100ms 扫描全部在途任务
+        self._done_queue = queue.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, total))
+        self._futures = {self._executor.submit(create_zoom_figure, **kw): i
+                         for i, kw in jobs}
+        for fut in self._futures:
+            fut.add_done_callback(self._done_queue.put)
+
         self.start_btn.configure(state=tk.DISABLED)
         self.cancel_btn.configure(state=tk.NORMAL)
-        self._process_job = self.dialog.after(10, self._process_next_file)
+        self._process_job = self.dialog.after(100, self._poll_batch)
 
-    def _process_next_file(self):
-        """逐个处理文件，避免在子线程访问 Tk 组件"""
+    def _poll_batch(self):
+        """主线程轮询已完成的任务并更新界面（Tk 组件不进子进程）"""
         self._process_job = None
 
         if not self.processing:
             return
 
-        total = len(self.file_pairs)
-        if self._current_index >= total:
-            self._finish_processing(cancelled=False)
-            return
-
-        i = self._current_index
-        pano, zoom = self.file_pairs[i]
+        finished = []
+        while True:
+            try:
+                finished.append(self._done_queue.get_nowait())
+            except queue.Empty:
+                break
 
-        progress = (i / total) * 100 if total else 0
-        self.progress_var.set(progress)
-        self.progress_label.configure(text=f"处理中: {i+1}/{total}")
+        # 空轮询（多数 tick）不碰任何界面组件
+        if not finished:
+            self._process_job = self.dialog.after(100, self._poll_batch)
+            return
 
         items = self.tree.get_children()
-        item = items[i] if i < len(items) else None
-        if item:
-            self.tree.set(item, 'status', '处理中...')
-        self.dialog.update_idletasks()
-
-        ext_map = {'PNG': '.png', 'JPEG': '.jpg', 'TIFF': '.tif'}
-        ext = ext_map.get(self.output_format.get(), '.png')
-
-        try:
-            # 生成输出文件名
-            name = Path(pano).stem
-            output_name = self.naming_pattern.get().replace('{name}', name) + ext
-            output_path = Path(self.output_dir.get()) / output_name
+        total = len(self.file_pairs)
+        for fut in finished:
+            i = self._futures.pop(fut, None)
+            if i is None:
+                continue
+            item = items[i] if i < len(items) else None
+            try:
+                fut.result()
+            except Exception as e:
+                if item:
+                    self.tree.set(item, 'status', f'失败: {str(e)[:20]}')
+                self._failed += 1
+            else:
+                if item:
+                    self.tree.set(item, 'status', '完成')
+                self._success += 1
+            self._done_count += 1
 
-            create_zoom_figure(**self.gui._build_render_kwargs(
-                pano,
-                zoom,
-                str(output_path),
-            ))
+        self.progress_var.set((self._done_count / total) * 100 if total else 0)
+        self.progress_label.configure(text=f"处理中: {self._done_count}/{total}")
 
-            if item:
-                self.tree.set(item, 'status', '完成')
-            self._success += 1
+        if not self._futures:
+            self._shutdown_executor()
+            self._finish_processing(cancelled=False)
+            return
 
-        except Exception as e:
-            if item:
-                self.tree.set(item, 'status', f'失败: {str(e)[:20]}')
-            self._failed += 1
+        self._process_job = self.dialog.after(100, self._poll_batch)
 
-        self._current_index += 1
-        if self.processing:
-            self._process_job = self.dialog.after(10, self._process_next_file)
+    def _shutdown_executor(self):
+        """回收进程池，撤销尚未开始的任务"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._futures = {}
 
     def _finish_processing(self, cancelled=False):
         """结束批处理并更新界面状态"""
@@ -2528,7 +3250,7 @@ class BatchProcessDialog:
         self.cancel_btn.configure(state=tk.DISABLED)
 
         total = len(self.file_pairs)
-        processed = self._current_index
+        processed = self._done_count
 
         if cancelled:
             progress = (processed / total) * 100 if total else 0
@@ -2554,6 +3276,7 @@ class BatchProcessDialog:
         if self._process_job:
             self.dialog.after_cancel(self._process_job)
             self._process_job = None
+        self._shutdown_executor()
         self._finish_processing(cancelled=True)
 
     def close_dialog(self):
@@ -2565,6 +3288,7 @@ class BatchProcessDialog:
             except tk.TclError:
                 pass
             self._process_job = None
+        self._shutdown_executor()
         self.dialog.destroy()
 
 